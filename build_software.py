@@ -1,4 +1,9 @@
 import argparse
+import concurrent.futures
+import functools
+import hashlib
+import io
+import multiprocessing
 import os
 import pathlib
 import shutil
@@ -6,7 +11,7 @@ import subprocess
 import time
 import zipfile
 
-from download_datasets import download_file
+import requests
 
 
 def create_dir(dirname):
@@ -23,60 +28,600 @@ JAVAPLEX_URL = (
 )
 
 
+def download_zip(url):
+    # keep the (small) archive in memory instead of writing it to disk
+    req = requests.get(url)
+    req.raise_for_status()
+    print(f"Downloaded {url}")
+    return zipfile.ZipFile(io.BytesIO(req.content))
+
+
+def is_downloaded(artifact, manifest, url):
+    # the manifest records the source URL to invalidate stale downloads
+    manifest = pathlib.Path(manifest)
+    return (
+        pathlib.Path(artifact).exists()
+        and manifest.exists()
+        and manifest.read_text() == url
+    )
+
+
 def download_perseus(perseus_url=PERSEUS_URL):
+    manifest = "backends_src/perseus/.source_url"
+    if is_downloaded("backends_src/perseus/Pers.cpp", manifest, perseus_url):
+        print("Perseus already downloaded, skipping...")
+        return
     # download Perseus from project server
-    perseus_zip = perseus_url.split("/")[-1]
-    download_file(perseus_url, perseus_zip)
-    create_dir("perseus")
-    with zipfile.ZipFile(perseus_zip, "r") as src:
+    with download_zip(perseus_url) as src:
         src.extractall("backends_src/perseus")
-    # remove zip
-    os.remove(perseus_zip)
+    pathlib.Path(manifest).write_text(perseus_url)
 
 
 def download_javaplex(jplex_url=JAVAPLEX_URL):
+    manifest = "backends_src/.javaplex_source_url"
+    if is_downloaded("backends_src/javaplex.jar", manifest, jplex_url):
+        print("JavaPlex already downloaded, skipping...")
+        return
     # download JAR from GitHub repository latest release
-    jplex_zip = jplex_url.split("/")[-1]
-    download_file(jplex_url, jplex_zip)
-    create_dir("javaplex")
-    with zipfile.ZipFile(jplex_zip, "r") as src:
-        src.extract("javaplex/library/javaplex.jar")
-    # move JAR to cwd
-    os.replace("javaplex/library/javaplex.jar", "backends_src/javaplex.jar")
-    os.removedirs("javaplex/library")
-    # remove zip
-    os.remove(jplex_zip)
+    # and copy it straight out of the archive
+    with download_zip(jplex_url) as src, src.open(
+        "javaplex/library/javaplex.jar"
+    ) as jar, open("backends_src/javaplex.jar", "wb") as dst:
+        shutil.copyfileobj(jar, dst, length=1 << 20)
+    pathlib.Path(manifest).write_text(jplex_url)
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # os.sched_getaffinity is not available on every platform
+        return multiprocessing.cpu_count()
+
+
+CCACHE = shutil.which("ccache")
+
+
+def ccache_opts():
+    # cache object files across rebuilds when ccache is available
+    if CCACHE is None:
+        return []
+    return [
+        "-DCMAKE_C_COMPILER_LAUNCHER=ccache",
+        "-DCMAKE_CXX_COMPILER_LAUNCHER=ccache",
+    ]
+
+
+def accepts_linker(compiler, lang, linker):
+    try:
+        probe = subprocess.run(
+            [compiler, f"-fuse-ld={linker}", "-x", lang, "-", "-o", os.devnull],
+            input="int main() { return 0; }",
+            capture_output=True,
+            text=True,
+        )
+    except FileNotFoundError:
+        return False
+    return probe.returncode == 0
+
+
+@functools.lru_cache(maxsize=None)
+def find_linker():
+    # faster (parallel) linkers for the large ParaView & TTK libraries,
+    # provided both the C and C++ compilers support them (GCC < 12.1
+    # rejects mold)
+    compilers = [
+        (os.environ.get("CC", "cc"), "c"),
+        (os.environ.get("CXX", "c++"), "c++"),
+    ]
+    for linker, exe in (("mold", "mold"), ("lld", "ld.lld")):
+        if shutil.which(exe) is None:
+            continue
+        if all(accepts_linker(cc, lang, linker) for cc, lang in compilers):
+            return linker
+    return None
+
+
+def linker_opts():
+    linker = find_linker()
+    if linker is None:
+        return []
+    return [
+        f"-DCMAKE_EXE_LINKER_FLAGS=-fuse-ld={linker}",
+        f"-DCMAKE_SHARED_LINKER_FLAGS=-fuse-ld={linker}",
+        f"-DCMAKE_MODULE_LINKER_FLAGS=-fuse-ld={linker}",
+    ]
+
+
+NINJA = shutil.which("ninja")
+
+
+def generator_opts(builddir):
+    # prefer Ninja over the default Makefiles generator, but keep the
+    # generator of an already configured build directory
+    if NINJA is None or (pathlib.Path(builddir) / "CMakeCache.txt").exists():
+        return []
+    return ["-G", "Ninja"]
+
+
+def fetch_submodules(jobs):
+    # submodule history is not needed: fetch only the pinned commits
+    update = ["git", "submodule", "update", "--init", "--recursive", "-j", jobs]
+    try:
+        subprocess.run(update + ["--depth", "1"], check=True)
+    except subprocess.CalledProcessError:
+        # some servers refuse to serve a pinned commit that is not a
+        # branch tip: fetch the full history of the failing submodules
+        status = subprocess.run(
+            ["git", "submodule", "status", "--recursive"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        for line in status.splitlines():
+            # "+" marks a submodule not checked out at its pinned commit
+            if not line.startswith("+"):
+                continue
+            path = line.split()[1]
+            shallow = subprocess.run(
+                ["git", "rev-parse", "--is-shallow-repository"],
+                cwd=path,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+            if shallow == "true":
+                subprocess.run(["git", "fetch", "--unshallow"], cwd=path, check=True)
+        subprocess.run(update, check=True)
+
+
+def paraview_src(vers):
+    # one worktree per version so that several ParaView versions can be
+    # built at the same time
+    return f"build_dirs/paraview-ttk_{vers}"
+
+
+def prepare_paraview_sources(versions):
+    # run once from the main process: concurrent git commands in the same
+    # repository fail on its lock files
+    repo = "backends_src/paraview-ttk"
+    missing = []
+    for vers in versions:
+        has_tag = subprocess.run(
+            ["git", "rev-parse", "-q", "--verify", f"refs/tags/{vers}"],
+            cwd=repo,
+            capture_output=True,
+        )
+        if has_tag.returncode != 0:
+            missing.append(vers)
+    if missing:
+        # shallow clones come without the ParaView release tags
+        tags = [arg for vers in missing for arg in ("tag", vers)]
+        subprocess.run(
+            ["git", "fetch", "--depth", "1", "origin"] + tags, cwd=repo, check=True
+        )
+    # forget worktrees whose directory has been removed
+    subprocess.run(["git", "worktree", "prune"], cwd=repo, check=True)
+    for vers in versions:
+        pv = paraview_src(vers)
+        if pathlib.Path(pv).exists():
+            subprocess.run(["git", "checkout", "--detach", vers], cwd=pv, check=True)
+        else:
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", os.path.abspath(pv), vers],
+                cwd=repo,
+                check=True,
+            )
+
+
+def reset_submodules():
+    # git submodule foreach has no --jobs option: reset the submodules
+    # worktrees concurrently from here
+    paths = subprocess.run(
+        ["git", "submodule", "foreach", "--quiet", "echo $sm_path"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    # patched submodules are reset by apply_patches, only when needed
+    patched = [f"backends_src/{soft}" for soft in PATCHES]
+    paths = [path for path in paths if path not in patched]
+    with concurrent.futures.ThreadPoolExecutor(available_cores()) as pool:
+        procs = pool.map(
+            lambda path: subprocess.run(
+                ["git", "checkout", "--", "."], cwd=path, check=True
+            ),
+            paths,
+        )
+        # propagate errors
+        list(procs)
+
+
+def is_configured(builddir):
+    # a failed configure leaves CMakeCache.txt behind but generates no
+    # build files
+    builddir = pathlib.Path(builddir)
+    generated = ["build.ninja", "Makefile", "CMakeFiles/cmake.check_cache"]
+    return (builddir / "CMakeCache.txt").exists() and any(
+        (builddir / path).exists() for path in generated
+    )
+
+
+def need_configure(builddir, src_dir, extra_stamps=()):
+    # (re)configure only when the build directory is not (successfully)
+    # configured or its cache is older than the top-level CMakeLists.txt,
+    # this script (holding the options) or any extra stamp file
+    if not is_configured(builddir):
+        return True
+    cache = pathlib.Path(builddir) / "CMakeCache.txt"
+    mtime = cache.stat().st_mtime
+    stamps = [*pathlib.Path(src_dir).glob("CMakeLists.txt"), __file__]
+    stamps += extra_stamps
+    return any(pathlib.Path(p).stat().st_mtime > mtime for p in stamps)
+
+
+# environment without paths to already installed software, computed once
+_BASE_CLEAN_ENV = {
+    k: v
+    for k, v in os.environ.items()
+    if k not in ("PYTHONPATH", "LD_LIBRARY_PATH", "PV_PLUGIN_PATH")
+}
+_BASE_CLEAN_ENV["CMAKE_PREFIX_PATH"] = ""
+
+
+# at most that many libraries are built at the same time
+MAX_BUILD_WORKERS = 3
+# number of compile jobs per library build (set by init_worker)
+BUILD_JOBS = str(available_cores())
+
+
+def init_worker(build_jobs):
+    global BUILD_JOBS
+    # share the available cores between the concurrent builds
+    BUILD_JOBS = build_jobs
+    os.environ["CMAKE_BUILD_PARALLEL_LEVEL"] = build_jobs
 
 
 def clean_env():
-    env = dict(os.environ)
-    env.pop("PYTHONPATH", None)
-    env.pop("LD_LIBRARY_PATH", None)
-    env.pop("PV_PLUGIN_PATH", None)
-    env["CMAKE_PREFIX_PATH"] = ""
+    env = dict(_BASE_CLEAN_ENV)
+    env["CMAKE_BUILD_PARALLEL_LEVEL"] = BUILD_JOBS
     return env
 
 
 def build_paraview(prefix, vers, opts):
-    pv = "backends_src/paraview-ttk"
-    builddir = f"build_dirs/paraview_{vers}"
+    # build directory used before the per-version worktrees, replaced by
+    # build_dirs/paraview-build_{vers} (see below)
+    legacy_builddir = pathlib.Path(f"build_dirs/paraview_{vers}")
+    if legacy_builddir.is_dir():
+        shutil.rmtree(legacy_builddir)
+    # skip the build if this prefix already holds the same ParaView install
+    key = hashlib.sha256((vers + "|" + "|".join(opts)).encode()).hexdigest()
+    key_file = pathlib.Path(prefix) / ".build_key"
+    config = "lib/cmake/paraview-*/ParaViewConfig.cmake"
+    installed = any(pathlib.Path(prefix).glob(config))
+    if installed and key_file.exists() and key_file.read_text() == key:
+        print(f"ParaView {vers} already installed in {prefix}, skipping...")
+        return
+    # sources checked out by prepare_paraview_sources
+    pv = paraview_src(vers)
+    # not build_dirs/paraview_{vers}: that one was configured from
+    # backends_src/paraview-ttk and CMake refuses to change its source
+    builddir = f"build_dirs/paraview-build_{vers}"
     create_dir(builddir)
-    subprocess.run(["git", "checkout", vers], cwd=pv, check=True)
+    if need_configure(builddir, pv):
+        first_configure = not is_configured(builddir)
+        subprocess.check_call(
+            ["cmake"]
+            + ["-S", pv]
+            + ["-B", builddir]
+            + generator_opts(builddir)
+            + ["-DCMAKE_BUILD_TYPE=Release", f"-DCMAKE_INSTALL_PREFIX={prefix}"]
+            + opts
+            + linker_opts()
+            + ccache_opts(),
+            env=clean_env(),
+        )
+        # double configure needed here to prevent undefined reference errors
+        # (only until a configure succeeded, the cache is complete afterwards)
+        if first_configure:
+            subprocess.check_call(["cmake", builddir])
     subprocess.check_call(
-        ["cmake"]
-        + ["-S", pv]
-        + ["-B", builddir]
-        + ["-DCMAKE_BUILD_TYPE=Release", f"-DCMAKE_INSTALL_PREFIX={prefix}"]
-        + opts,
-        env=clean_env(),
+        ["cmake", "--build", builddir, "--target", "install"]
+        + ["--parallel", BUILD_JOBS]
     )
-    # double configure needed here to prevent undefined reference errors
-    subprocess.check_call(["cmake", builddir])
+    key_file.write_text(key)
+
+
+def build_cubicalripser_2dim(soft_src, builddir):
+    subprocess.run(["make", f"-j{BUILD_JOBS}"], cwd=soft_src, check=True)
+
+
+def build_cubicalripser_3dim(soft_src, builddir):
+    create_dir(builddir)
+    if need_configure(builddir, soft_src):
+        subprocess.check_call(
+            ["cmake", "-S", soft_src, "-B", builddir]
+            + generator_opts(builddir)
+            + ccache_opts()
+        )
     subprocess.check_call(
-        ["cmake", "--build", builddir, "--target", "install", "--parallel"]
+        ["cmake", "--build", builddir, "--parallel", BUILD_JOBS]
     )
 
 
+def build_perseus(soft_src, builddir):
+    # download Perseus
+    download_perseus()
+    # build perseus
+    try:
+        shutil.copy2("patches/Makefile.perseus", f"{soft_src}/Makefile")
+    except shutil.SameFileError:
+        pass
+    subprocess.run(["make", f"-j{BUILD_JOBS}"], cwd=soft_src, check=True)
+
+
+def build_diamorse(soft_src, builddir):
+    try:
+        subprocess.run(
+            ["make", f"-j{BUILD_JOBS}", "all"], cwd=soft_src, check=True
+        )
+    except subprocess.CalledProcessError:
+        print("Missing cython, python2-numpy to build diamorse")
+
+
+def build_eirene(soft_src, builddir):
+    subprocess.run(["julia", "-e", 'using Pkg; Pkg.add("Eirene")'], check=True)
+
+
+def build_javaplex(soft_src, builddir):
+    download_javaplex()
+    subprocess.run(
+        [
+            "javac",
+            "-classpath",
+            "backends_src/javaplex.jar",
+            "jplex_persistence.java",
+        ],
+        check=True,
+    )
+
+
+def build_gudhi(soft_src, builddir):
+    create_dir(builddir)
+    if need_configure(builddir, soft_src):
+        subprocess.check_call(
+            ["cmake"]
+            + [
+                "-DWITH_GUDHI_TEST=OFF",
+                "-DWITH_GUDHI_UTILITIES=OFF",
+                "-DCMAKE_BUILD_TYPE=Release",
+            ]
+            + ["-S", soft_src]
+            + ["-B", builddir]
+            + generator_opts(builddir)
+            + ccache_opts()
+        )
+    subprocess.check_call(
+        ["cmake", "--build", builddir, "--parallel", BUILD_JOBS]
+    )
+
+
+def build_ripser(soft_src, builddir):
+    subprocess.run(["make", f"-j{BUILD_JOBS}"], cwd=soft_src, check=True)
+
+
+def build_persistencecycles(soft_src, builddir):
+    # first build ParaView 5.6.1
+    pv_ver = PARAVIEW_VERSIONS["PersistenceCycles"]
+    prefix = f"build_dirs/install_paraview_{pv_ver}"
+    build_paraview(
+        prefix,
+        pv_ver,
+        ["-DPARAVIEW_BUILD_QT_GUI=OFF", "-DVTK_Group_ParaViewRendering=OFF"],
+    )
+    create_dir(builddir)
+    env = clean_env()
+    env["CMAKE_PREFIX_PATH"] = prefix
+    # reconfigure as well when ParaView has been rebuilt
+    pv_stamp = f"{prefix}/.build_key"
+    if need_configure(builddir, f"{soft_src}/ttk-0.9.7", [pv_stamp]):
+        subprocess.check_call(
+            ["cmake"]
+            + ["-S", f"{soft_src}/ttk-0.9.7"]
+            + ["-B", builddir]
+            + generator_opts(builddir)
+            + [
+                f"-DVTK_DIR={os.getcwd()}/{prefix}/lib/cmake/paraview-5.6",
+                "-DCMAKE_BUILD_TYPE=Release",
+                f"-DCMAKE_INSTALL_PREFIX={prefix}",
+                "-DTTK_ENABLE_KAMIKAZE=ON",
+            ]
+            + linker_opts()
+            + ccache_opts(),
+            env=env,
+        )
+    subprocess.check_call(
+        ["cmake", "--build", builddir, "--target", "install"]
+        + ["--parallel", BUILD_JOBS]
+    )
+
+
+def build_discretemorsesandwich(soft_src, builddir):
+    # first build ParaView 5.10.1
+    pv_ver = PARAVIEW_VERSIONS["DiscreteMorseSandwich"]
+    prefix = f"build_dirs/install_paraview_{pv_ver}"
+    build_paraview(
+        prefix,
+        pv_ver,
+        ["-DPARAVIEW_USE_QT=OFF", "-DVTK_Group_ENABLE_Rendering=NO"],
+    )
+    # prep env variable
+    create_dir(builddir)
+    env = clean_env()
+    env["CMAKE_PREFIX_PATH"] = prefix
+    # configure TTK build directory
+    pv_stamp = f"{prefix}/.build_key"
+    if need_configure(builddir, soft_src, [pv_stamp]):
+        subprocess.check_call(
+            ["cmake"]
+            + ["-S", f"{soft_src}"]
+            + ["-B", builddir]
+            + generator_opts(builddir)
+            + [
+                f"-DVTK_DIR={os.getcwd()}/{prefix}/lib/cmake/paraview-5.10",
+                "-DCMAKE_BUILD_TYPE=Release",
+                f"-DCMAKE_INSTALL_PREFIX={prefix}",
+                "-DTTK_ENABLE_KAMIKAZE=ON",
+            ]
+            + linker_opts()
+            + ccache_opts(),
+            env=env,
+        )
+    # build & install TTK in ParaView install prefix
+    subprocess.check_call(
+        ["cmake", "--build", builddir, "--target", "install"]
+        + ["--parallel", BUILD_JOBS]
+    )
+
+
+def build_cmake_release(soft_src, builddir):
+    create_dir(builddir)
+    if need_configure(builddir, soft_src):
+        subprocess.check_call(
+            ["cmake", "-S", soft_src, "-B", builddir, "-DCMAKE_BUILD_TYPE=Release"]
+            + generator_opts(builddir)
+            + ccache_opts()
+        )
+    subprocess.check_call(
+        ["cmake", "--build", builddir, "--parallel", BUILD_JOBS]
+    )
+
+
+# patches applied (in one go) on a clean checkout before building
+PATCHES = {
+    "diamorse": [
+        "diamorse_0001-Makefile-Target-Python2.patch",
+        "diamorse_0002-persistence.py-Add-Gudhi-format-output.patch",
+    ],
+    # prevent segfaults
+    "PersistenceCycles": [
+        "PersistenceCycles_0001-Fix-Wreturn-type.patch",
+        "PersistenceCycles_0003-Output-Diagram-in-Gudhi-format.patch",
+    ],
+    "dipha": ["Dipha_0001-Print-sum-of-ranks-memory-peaks.patch"],
+    # "DiscreteMorseSandwich": ["DiscreteMorseSandwich_filters.patch"],
+    # "oineus": ["oineus_0001-New-example-file-for-simplicial-complexes.patch"],
+}
+
+
+def apply_patches(soft_src, patches):
+    patches = [f"../../patches/{patch}" for patch in patches]
+    # leave already patched sources untouched: rewriting the patched files
+    # would trigger a full rebuild of their dependents
+    applied = subprocess.run(
+        ["git", "apply", "--reverse", "--check"] + patches,
+        cwd=soft_src,
+        capture_output=True,
+    )
+    if applied.returncode == 0:
+        return
+    subprocess.run(["git", "checkout", "."], cwd=soft_src, check=True)
+    subprocess.run(["git", "apply"] + patches, cwd=soft_src, check=True)
+
+
+# libraries whose build failures do not abort the whole build
+OPTIONAL_SOFTS = ("diamorse",)
+# libraries that are not built from a submodule
+STANDALONE_SOFTS = ("Eirene.jl", "JavaPlex", "perseus")
+# libraries built on top of a ParaView install, with its version
+PARAVIEW_VERSIONS = {
+    "DiscreteMorseSandwich": "v5.10.1",
+    "PersistenceCycles": "v5.6.1",
+}
+# libraries built with CMake in build_dirs
+CMAKE_SOFTS = (
+    "CubicalRipser_3dim",
+    "DiscreteMorseSandwich",
+    "PersistenceCycles",
+    "dipha",
+    "gudhi",
+    "oineus",
+)
+
+
+def build_dir(soft, soft_src):
+    # one build directory per patch set and submodule commit: unchanged
+    # inputs only trigger an incremental build
+    inputs = hashlib.sha256()
+    for patch in PATCHES.get(soft, []):
+        inputs.update(pathlib.Path(f"patches/{patch}").read_bytes())
+    if pathlib.Path(soft_src, ".git").exists():
+        head = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=soft_src,
+            check=True,
+            capture_output=True,
+        )
+        inputs.update(head.stdout)
+    return f"build_dirs/{soft}-{inputs.hexdigest()[:12]}"
+
+
+def link_build_dir(soft, builddir):
+    # the benchmark scripts expect the binaries in build_dirs/<soft>:
+    # point it to the latest successful build
+    link = pathlib.Path(f"build_dirs/{soft}")
+    if link.is_symlink():
+        link.unlink()
+    elif link.is_dir():
+        shutil.rmtree(link)
+    link.symlink_to(pathlib.Path(builddir).name)
+    # remove the build directories of outdated inputs
+    for stale in pathlib.Path("build_dirs").glob(f"{soft}-*"):
+        if stale != pathlib.Path(builddir) and stale.is_dir():
+            shutil.rmtree(stale)
+
+
+BUILDERS = {
+    "CubicalRipser_2dim": build_cubicalripser_2dim,
+    "CubicalRipser_3dim": build_cubicalripser_3dim,
+    "perseus": build_perseus,
+    "diamorse": build_diamorse,
+    "Eirene.jl": build_eirene,
+    "JavaPlex": build_javaplex,
+    "gudhi": build_gudhi,
+    "ripser": build_ripser,
+    "PersistenceCycles": build_persistencecycles,
+    "DiscreteMorseSandwich": build_discretemorsesandwich,
+    "dipha": build_cmake_release,
+    "oineus": build_cmake_release,
+}
+
+
+def build_one(soft):
+    print(f"Building {soft}...", flush=True)
+    soft_src = f"backends_src/{soft}"
+    start = time.time()
+    if soft in CMAKE_SOFTS:
+        builddir = build_dir(soft, soft_src)
+    else:
+        builddir = f"build_dirs/{soft}"
+    if soft in PATCHES:
+        try:
+            apply_patches(soft_src, PATCHES[soft])
+        except subprocess.CalledProcessError:
+            if soft not in OPTIONAL_SOFTS:
+                raise
+            print(f"Could not patch {soft}, skipping...", flush=True)
+            return
+    builder = BUILDERS.get(soft)
+    if builder is not None:
+        builder(soft_src, builddir)
+    if soft in CMAKE_SOFTS:
+        link_build_dir(soft, builddir)
+    end = time.time()
+    print(f"Built {soft} in {int(end - start)} seconds\n", flush=True)
+
+
 def main(subset=False):
 
     softs = [
@@ -106,190 +651,48 @@ def main(subset=False):
         # has been built
         pathlib.Path(".not_all_apps").touch()
 
-    # 1. Fetch submodules
-    subprocess.run(["git", "submodule", "update", "--init", "--recursive"], check=True)
-    subprocess.run(
-        ["git", "submodule", "foreach", "git", "checkout", "--", "."], check=True
-    )
-
-    # 2. Build each library
     create_dir("build_dirs")
-    for soft in softs:
-        print(f"Building {soft}...")
-        soft_src = f"backends_src/{soft}"
-        start = time.time()
-        builddir = f"build_dirs/{soft}"
-        if soft == "CubicalRipser_2dim":
-            # build CubicalRipser
-            subprocess.run(["make"], cwd=soft_src, check=True)
-        elif soft == "CubicalRipser_3dim":
-            #build CubicalRipser 3D
-            create_dir(builddir)
-            subprocess.check_call(["cmake", f"../../{soft_src}"], cwd=builddir)
-            subprocess.check_call(["make"], cwd=builddir)
-
-        elif soft == "perseus":
-            # download Perseus
-            download_perseus()
-            # build perseus
-            try:
-                shutil.copy2("patches/Makefile.perseus", f"{soft_src}/Makefile")
-            except shutil.SameFileError:
-                pass
-            subprocess.run(["make"], cwd=soft_src, check=True)
-        elif soft == "diamorse":
-            # build diamorse
-            try:
-                subprocess.run(["git", "checkout", "."], cwd=soft_src, check=True)
-                subprocess.run(
-                    [
-                        "git",
-                        "apply",
-                        "../../patches/diamorse_0001-Makefile-Target-Python2.patch",
-                        "../../patches/diamorse_0002-persistence.py-Add-Gudhi-format-output.patch",
-                    ],
-                    cwd=soft_src,
-                    check=True,
-                )
-                subprocess.run(["make", "all"], cwd=soft_src, check=True)
-            except subprocess.CalledProcessError:
-                print("Missing cython, python2-numpy to build diamorse")
-        elif soft == "Eirene.jl":
-            subprocess.run(["julia", "-e", 'using Pkg; Pkg.add("Eirene")'], check=True)
-        elif soft == "JavaPlex":
-            download_javaplex()
-            subprocess.run(
-                [
-                    "javac",
-                    "-classpath",
-                    "backends_src/javaplex.jar",
-                    "jplex_persistence.java",
-                ],
-                check=True,
-            )
-        elif soft == "gudhi":
-            create_dir(builddir)
-            subprocess.check_call(
-                ["cmake"]
-                + [
-                    "-DWITH_GUDHI_TEST=OFF",
-                    "-DWITH_GUDHI_UTILITIES=OFF",
-                    "-DCMAKE_BUILD_TYPE=Release",
-                ]
-                + ["-S", soft_src]
-                + ["-B", builddir]
-            )
-            subprocess.check_call(["cmake", "--build", builddir, "--parallel"])
-        elif soft == "ripser":
-            subprocess.run(["make"], cwd=soft_src, check=True)
-        elif soft == "PersistenceCycles":
-            # first build ParaView 5.6.1
-            pv_ver = "v5.6.1"
-            prefix = f"build_dirs/install_paraview_{pv_ver}"
-            build_paraview(
-                prefix,
-                pv_ver,
-                ["-DPARAVIEW_BUILD_QT_GUI=OFF", "-DVTK_Group_ParaViewRendering=OFF"],
-            )
-            # apply patch (to prevent segfaults)
-            subprocess.run(["git", "checkout", "."], cwd=soft_src, check=True)
-            subprocess.run(
-                [
-                    "git",
-                    "apply",
-                    "../../patches/PersistenceCycles_0001-Fix-Wreturn-type.patch",
-                    "../../patches/PersistenceCycles_0003-Output-Diagram-in-Gudhi-format.patch",
-                ],
-                cwd=soft_src,
-                check=True,
-            )
-            create_dir(builddir)
-            env = clean_env()
-            env["CMAKE_PREFIX_PATH"] = prefix
-            subprocess.check_call(
-                ["cmake"]
-                + ["-S", f"{soft_src}/ttk-0.9.7"]
-                + ["-B", builddir]
-                + [
-                    f"-DVTK_DIR={os.getcwd()}/{prefix}/lib/cmake/paraview-5.6",
-                    "-DCMAKE_BUILD_TYPE=Release",
-                    f"-DCMAKE_INSTALL_PREFIX={prefix}",
-                    "-DTTK_ENABLE_KAMIKAZE=ON",
-                ],
-                env=env,
-            )
-            subprocess.check_call(
-                ["cmake", "--build", builddir, "--target", "install", "--parallel"]
-            )
-        elif soft == "DiscreteMorseSandwich":
-            # first build ParaView 5.10.1
-            pv_ver = "v5.10.1"
-            prefix = f"build_dirs/install_paraview_{pv_ver}"
-            build_paraview(
-                prefix,
-                pv_ver,
-                ["-DPARAVIEW_USE_QT=OFF", "-DVTK_Group_ENABLE_Rendering=NO"],
-            )
-            ## apply DiscreteMorseSandwich patch
-            #subprocess.run(
-            #    [
-            #        "git",
-            #        "apply",
-            #        "../../patches/DiscreteMorseSandwich_filters.patch",
-            #    ],
-            #    cwd=soft_src,
-            #    check=True,
-            #)
-            # prep env variable
-            create_dir(builddir)
-            env = clean_env()
-            env["CMAKE_PREFIX_PATH"] = prefix
-            # configure TTK build directory
-            subprocess.check_call(
-                ["cmake"]
-                + ["-S", f"{soft_src}"]
-                + ["-B", builddir]
-                + [
-                    f"-DVTK_DIR={os.getcwd()}/{prefix}/lib/cmake/paraview-5.10",
-                    "-DCMAKE_BUILD_TYPE=Release",
-                    f"-DCMAKE_INSTALL_PREFIX={prefix}",
-                    "-DTTK_ENABLE_KAMIKAZE=ON",
-                ],
-                env=env,
-            )
-            # build & install TTK in ParaView install prefix
-            subprocess.check_call(
-                ["cmake", "--build", builddir, "--target", "install", "--parallel"]
-            )
-        elif soft == "dipha" or soft == "oineus":
-            if(soft=="dipha"):
-                subprocess.run(
-                    [
-                        "git",
-                        "apply",
-                        "../../patches/Dipha_0001-Print-sum-of-ranks-memory-peaks.patch",
-                    ],
-                    cwd=soft_src,
-                    check=True,
-                )
-            #elif soft == "oineus":
-            #    subprocess.run(
-            #        [
-            #            "git",
-            #            "apply",
-            #            "../../patches/oineus_0001-New-example-file-for-simplicial-complexes.patch",
-            #        ],
-            #        cwd=soft_src,
-            #        check=True,
-            #    )
-            create_dir(builddir)
-            subprocess.check_call(
-                ["cmake", "-S", soft_src, "-B", builddir, "-DCMAKE_BUILD_TYPE=Release"]
-            )
-            subprocess.check_call(["cmake", "--build", builddir, "--parallel"])
+    workers = min(MAX_BUILD_WORKERS, len(softs))
+    build_jobs = str(max(1, available_cores() // workers))
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(build_jobs,),
+    ) as pool:
+        futures = []
+        try:
+            # 1. Build the libraries that do not need the submodules (and
+            # download their sources) while the submodules are being fetched
+            futures += [
+                pool.submit(build_one, soft)
+                for soft in softs
+                if soft in STANDALONE_SOFTS
+            ]
+
+            # 2. Fetch submodules
+            jobs = str(available_cores())
+            fetch_submodules(jobs)
+            reset_submodules()
+            pv_versions = [
+                PARAVIEW_VERSIONS[soft] for soft in softs if soft in PARAVIEW_VERSIONS
+            ]
+            if pv_versions:
+                prepare_paraview_sources(pv_versions)
 
-        end = time.time()
-        print(f"Built {soft} in {int(end - start)} seconds\n")
+            # 3. Build the other libraries, the (long) ParaView-based builds
+            # start first and overlap with each other and with the remaining
+            # libraries
+            order = [soft for soft in softs if soft not in STANDALONE_SOFTS]
+            order.sort(key=lambda soft: soft not in PARAVIEW_VERSIONS)
+            futures += [pool.submit(build_one, soft) for soft in order]
+            for fut in concurrent.futures.as_completed(futures):
+                fut.result()
+        except BaseException:
+            # stop at the first failure instead of waiting for the queued
+            # builds (running ones still finish)
+            for fut in futures:
+                fut.cancel()
+            raise
 
 
 if __name__ == "__main__":